@@ -1,12 +1,75 @@
 from ._typing_scene import CodingTutorial
 from ._infrastructure._ai import GoogleGenAI
 import argparse
+import asyncio
 from pathlib import Path
 from rich.console import Console
 
 # Initialize console for rich logging
 _console = Console()
 
+
+def _stat_path(path):
+    """Resolve a path and check that it exists."""
+    _path = Path(path).resolve()
+    return _path, _path.exists()
+
+
+async def _stat_paths(paths):
+    """Resolve and check all paths concurrently (they may live on slow mounts)."""
+    return await asyncio.gather(*[asyncio.to_thread(_stat_path, p) for p in paths])
+
+
+def _path_splits(value):
+    """Candidate (path, purpose) readings of a value, whole value first.
+
+    Paths may themselves contain "=", so every "=" is a possible separator,
+    tried from the rightmost one (the longest path) leftwards.
+    """
+    _splits = [(value, None)]
+    _index = value.rfind("=")
+    while _index > 0:
+        _splits.append((value[:_index], value[_index + 1 :] or None))
+        _index = value.rfind("=", 0, _index)
+    return _splits
+
+
+class ExistingPathAction(argparse.Action):
+    """Parse `path` or `path=purpose` values, failing fast on missing paths.
+
+    A value is split into path and purpose only where the part before "="
+    is an existing path; otherwise the whole value is taken as the path.
+    """
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        _candidates = [_path_splits(value) for value in values]
+        _stats = iter(
+            asyncio.run(
+                _stat_paths(
+                    [path for splits in _candidates for path, _ in splits]
+                )
+            )
+        )
+
+        _entries, _missing = [], []
+        for value, splits in zip(values, _candidates):
+            _found = [
+                (resolved, purpose)
+                # `splits` first, so zip stops without consuming extra stats
+                for (_, purpose), (resolved, exists) in zip(splits, _stats)
+                if exists
+            ]
+            if _found:
+                _entries.append(_found[0])
+            else:
+                _missing.append(value)
+
+        if _missing:
+            raise argparse.ArgumentError(self, f"Incorrect Path: {', '.join(_missing)}")
+
+        setattr(namespace, self.dest, _entries)
+
+
 # Argument parser setup
 parser = argparse.ArgumentParser(description="Paths for Coding Tutorial.")
 
@@ -32,8 +95,10 @@ parser.add_argument(
     "--io-path",
     nargs="+",  # Fixed syntax error
     type=str,
+    action=ExistingPathAction,
     required=False,
-    help="Paths to directories you want to consider for code generation.",
+    help="""Paths to directories you want to consider for code generation. Use
+    `path=purpose` to give the purpose directly, otherwise it is asked for.""",
 )
 parser.add_argument(
     "--narration-type",
@@ -64,26 +129,37 @@ parser.add_argument(
     action="store_true",  # Makes it a flag (True if provided, False if absent)
     help="Add flowchart visualization at the end of each code segment (default: False).",
 )
+parser.add_argument(
+    "--typing-delay",
+    type=float,
+    default=0.1,
+    help="Seconds per typed character; 0 types each line instantly (default: 0.1).",
+)
+# --no-cache and --replay are opposite cache policies
+_cache_group = parser.add_mutually_exclusive_group()
+_cache_group.add_argument(
+    "--no-cache",
+    action="store_true",
+    help="Always query the LLM and synthesize speech instead of reusing cached results (default: False).",
+)
+_cache_group.add_argument(
+    "--replay",
+    action="store_true",
+    help="Only reuse cached LLM responses and narration audio, failing on a miss (default: False).",
+)
 
 # Parse arguments
 _args = parser.parse_args()
 
-# Resolve and validate paths
+# Collect path information (paths were validated while parsing)
 if _args.io_path:
-    resolved_paths = [Path(path).resolve() for path in _args.io_path]
-
-    # Collect purposes for each path
-    _purpose = []
-    for _path in resolved_paths:
-        if not _path.exists():
-            raise ValueError(f"Incorrect Path: {_path}")
-
-        _console.log(f"What is the purpose of the path {_path}?")
-        _p = input("Enter purpose: ")
-        _purpose.append(_p)
-
-    # Combine paths and purposes
-    path_info = [(_dir_path, _p) for _dir_path, _p in zip(resolved_paths, _purpose)]
+    # Ask for the purposes that weren't given on the command line
+    path_info = []
+    for _path, _p in _args.io_path:
+        if _p is None:
+            _console.log(f"What is the purpose of the path {_path}?")
+            _p = input("Enter purpose: ")
+        path_info.append((_path, _p))
 
     # Log collected path information
     _console.log("[green]Collected Path Information:[/green]")
@@ -93,7 +169,14 @@ else:
     path_info = []
     _console.log("[yellow]No paths provided. Skipping path setup.[/yellow]")
 
-_ai_object = GoogleGenAI(_args.google_api_key, force_approve=_args.force_approve)
+# One policy for both the LLM response cache and the narration audio cache
+_cache_policy = "replay" if _args.replay else "disabled" if _args.no_cache else "enabled"
+
+_ai_object = GoogleGenAI(
+    _args.google_api_key,
+    force_approve=_args.force_approve,
+    cache_policy=_cache_policy,
+)
 
 _tutorial = CodingTutorial(
     topic=_args.topic,
@@ -106,6 +189,8 @@ _tutorial = CodingTutorial(
     language=_args.language,
     add_titles=_args.add_titles,
     add_flowchart=_args.add_flowchart,
+    typing_delay=_args.typing_delay,
+    cache_policy=_cache_policy,
 )
 
 _tutorial.make_tutorial()
@@ -1,23 +1,105 @@
 """Class to create content using different vendors (Eg: Google)"""
 
 from .._base import BaseAI
+import copy
+from functools import cached_property
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Literal
 import google.generativeai as genai
+from diskcache import Cache
 from rich.console import Console
 
 _console = Console()
 
+# Responses are cached on disk so repeated runs on the same topic don't pay
+# for the same Gemini round-trips again.
+_CACHE_DIR = Path.home() / ".cache" / "pycoding" / "gemini"
+_CACHE_EXPIRE = 7 * 86400  # One week, in seconds.
+
+# Invariant narration instructions. Kept ahead of the code snippet so that
+# prompts for different snippets share the same prefix.
+_AUDIO_PROMPT_HEADER = """You are a coding tutor creating a voice narration script. Explain the following code snippet in a 
+            conversational, easy-to-follow way that works well for text-to-speech narration.
+
+            Guidelines for your explanation:
+            1. Start with a brief overview of what the code accomplishes
+            2. Break down the explanation into short, clear sentences
+            3. Avoid technical jargon unless necessary, and when used, briefly explain it
+            4. Use natural speech patterns (e.g., "Let's look at...", "Notice how...", "This part is important because...")
+            5. Keep sentences under 20 words for better TTS flow
+            6. Include pauses by using periods and commas strategically
+            7. Avoid special characters or symbols that might confuse TTS
+            8. Use concrete examples or analogies where helpful
+            9. End with a brief summary or key takeaway
+            10. Don't use any type of Quotes or Markdown formatting. Also, ignore unnecessary explanations
+            like `print` statements, `comments` etc.
+            11. Refer to variable names or special characters by their names. For example, `_` as `underscore`,
+            `is_variable` as `is underscore variable`.
+
+            Format your response as a natural, flowing explanation
+            """
+_AUDIO_PROMPT_PREFIX = (
+    _AUDIO_PROMPT_HEADER
+    + """
+            Code to explain:
+            ```
+            """
+)
+_AUDIO_PROMPT_SUFFIX = """
+            ```
+            """
+
 
 class GoogleGenAI(BaseAI):
-    def __init__(self, api_key, force_approve, model="gemini-2.0-flash-exp"):
-        """Initialization with default model and location."""
+    def __init__(
+        self,
+        api_key,
+        force_approve,
+        model="gemini-2.0-flash-exp",
+        cache_policy: Literal["enabled", "replay", "disabled"] = "enabled",
+    ):
+        """Initialization with default model and location.
+
+        `cache_policy` controls the on-disk response cache: `enabled` reads and
+        writes it, `replay` only reads it (a miss raises LookupError) and
+        `disabled` always queries the model.
+        """
         self.api_key = api_key
         self.force_approve = force_approve
+        self.model_name = model
+        self.cache_policy = cache_policy
 
-        # Configure the API with key and location
-        genai.configure(api_key=self.api_key)
+        # Configure the API with key and location. gRPC keeps one HTTP/2
+        # channel open and multiplexes every request over it.
+        genai.configure(api_key=self.api_key, transport="grpc")
         self.model = genai.GenerativeModel(model)
         self.chat = None  # Placeholder for the chat session
 
+        self._cache = None
+        self._last_cache_key = None  # See `discard_last_response`.
+        if cache_policy != "disabled":
+            self._cache = Cache(
+                str(_CACHE_DIR), eviction_policy="least-recently-used"
+            )
+
+        # Replay never talks to Gemini. Otherwise warm up in the background,
+        # so construction doesn't wait on the network.
+        if cache_policy != "replay":
+            threading.Thread(target=self._warm_up, daemon=True).start()
+
+    def _warm_up(self):
+        """Open the connection now so the first real request skips the TCP/TLS handshake."""
+        try:
+            self.model.count_tokens("warmup")
+        except Exception as e:
+            _console.log(
+                f"[yellow]Warning: Could not warm up the Gemini connection: {e}[/yellow]"
+            )
+
     def start_chat(self, history=None):
         """Start a chat session with Gemini."""
         if history is None:
@@ -27,53 +109,142 @@ class GoogleGenAI(BaseAI):
             history=history,
         )
 
+    def fork_chat(self):
+        """Return a copy of this model object with its own, empty chat session.
+
+        The copy shares the model and the response cache but not the chat
+        history, so it can be used from another thread.
+        """
+        _fork = copy.copy(self)
+        _fork.start_chat()
+        return _fork
+
+    def _cache_key(self, message):
+        """Key a message by model, current chat history and the message itself."""
+        _history = [
+            (content.role, [part.text for part in content.parts])
+            for content in self.chat.history
+        ]
+        _payload = self.model_name + json.dumps(_history) + message
+        return hashlib.blake2b(_payload.encode()).hexdigest()
+
+    def _lookup(self, message):
+        """Return the cache key and cached response (or None) for a message."""
+        if self._cache is None:
+            return None, None
+
+        _key = self._cache_key(message)
+        _text = self._cache.get(_key)
+        if _text is None:
+            if self.cache_policy == "replay":
+                raise LookupError(
+                    f"No cached response for this message (replay mode): {message[:60]!r}"
+                )
+        else:
+            # Record the cached turn so follow-up messages keep their context.
+            self.chat.history = [
+                *self.chat.history,
+                {"role": "user", "parts": [message]},
+                {"role": "model", "parts": [_text]},
+            ]
+        return _key, _text
+
+    def _store(self, key, text):
+        if key is not None:
+            self._cache.set(key, text, expire=_CACHE_EXPIRE)
+
+    def discard_last_response(self):
+        """Evict the last response from the cache, e.g. after the user rejected it."""
+        if self.cache_policy == "enabled" and self._last_cache_key is not None:
+            self._cache.delete(self._last_cache_key)
+        self._last_cache_key = None
+
+    def _approval_key(self, prompt, response):
+        """Key the user's approval of `response` to `prompt` for this model."""
+        _payload = "\0".join((self.model_name, prompt, response))
+        return "approved:" + hashlib.blake2b(_payload.encode()).hexdigest()
+
+    def _is_approved(self, prompt, response):
+        if self._cache is None:
+            return False
+        return self._approval_key(prompt, response) in self._cache
+
+    def _mark_approved(self, prompt, response):
+        if self.cache_policy == "enabled":
+            self._cache.set(
+                self._approval_key(prompt, response), True, expire=_CACHE_EXPIRE
+            )
+
     def send_message(self, message):
         """Send a message in the chat session."""
         if self.chat is None:
             raise ValueError("Call `start_chat` before sending a message.")
 
-        response = self.chat.send_message(message)
-        return response.text  # Extract the response content
+        _key, _text = self._lookup(message)
+        if _text is None:
+            response = self.chat.send_message(message)
+            _text = response.text  # Extract the response content
+            self._store(_key, _text)
+        self._last_cache_key = _key
+        return _text
+
+    async def send_message_async(self, message):
+        """Send a message in the chat session without blocking the event loop."""
+        if self.chat is None:
+            raise ValueError("Call `start_chat` before sending a message.")
+
+        _key, _text = self._lookup(message)
+        if _text is None:
+            response = await self.chat.send_message_async(message)
+            _text = response.text
+            self._store(_key, _text)
+        self._last_cache_key = _key
+        return _text
 
     def generate_tutorial_code(self, prompt):
         """Generate tutorial code based on the prompt."""
+        _response = self.send_message(prompt)
+
         while True:
-            _response = self.send_message(prompt)
             _console.log(_response)
 
-            if self.force_approve:
+            # A response approved on an earlier run doesn't need asking again.
+            if self.force_approve or self._is_approved(prompt, _response):
                 break
 
             _approval = input(f"Do you approve the code snippets? (yes/no): ")
 
             if _approval.lower() == "yes":
+                self._mark_approved(prompt, _response)
                 break
 
             else:
+                # Don't serve the rejected response again on the next run.
+                self.discard_last_response()
                 _feedback = input("Provide feedback to improve the response: ")
-                self.send_message(_feedback)
+                # The chat already holds the prompt and the last answer, so
+                # ask for a revision instead of re-sending the whole prompt.
+                _response = self.send_message(
+                    f"""{_feedback}
 
-        return _response
+                    Rewrite all the code snippets with this feedback, following the original instructions."""
+                )
 
+        return _response
 
-class PromptManager:
-    def __init__(self, language, topic, path_info=None):
-        self._language = language.lower()
-        self.topic = topic
-        self.path_info = path_info or []
 
-    def _get_base_prompt(self, language_name, code_block_syntax):
-        return f"""Write {language_name} code snippets to explain the following topic. 
+# Shared by every language; filled in with `str.format_map` by `PromptManager`.
+_BASE_PROMPT_TEMPLATE = """Write {language_name} code snippets to explain the following topic. 
         Write only well-commented code snippets, ensuring each snippet is under 30 seconds to read.
 
         **Topic:**  
-        {self.topic}
+        {topic}
 
         **Instructions:**  
         1. Split the code into multiple ```{code_block_syntax} your_code ``` blocks.  
         2. Each block should be well-commented, focusing on clarity and explanation.  
         3. Use or consider the following paths and their associated purposes in the code:  
-        {', '.join([f'Path: {path}, Purpose: {purpose}' for path, purpose in self.path_info])}
+        {paths}
         4. Make sure the code doesn't take more than 5 minutes to run.
         5. Refrain from User Inputs in the code.
         6. Only add essential and minimalistic code comments.
@@ -83,27 +254,7 @@ class PromptManager:
             - Include any required library installation code
         """
 
-    def build_prompt(self):
-        if "python" in self._language:
-            return self._python_prompt()
-        elif "cpp" in self._language:
-            return self._cpp_prompt()
-        elif ("r" in self._language) and (len(self._language) < 3):
-            return self._r_prompt()
-        elif "julia" in self._language:
-            return self._julia_prompt()
-        elif "rust" in self._language:
-            return self._rust_prompt()
-
-    def _python_prompt(self):
-        base = self._get_base_prompt("Python", "python")
-        return base
-
-    def _cpp_prompt(self):
-        base = self._get_base_prompt("C++", "cpp")
-        return (
-            base
-            + """
+_CPP_PROMPT_SUFFIX = """
         Additional C++ Instructions:
         1. Use Cling-specific pragmas when necessary, e.g.:
         #pragma cling add_include_path("your/path")
@@ -111,52 +262,94 @@ class PromptManager:
         2. Ensure compatibility with the Cling compiler.
         3. Use quotes instead of angle brackets while import any headers in the code.
         """
+
+_RUST_PROMPT_SUFFIX = """
+        Additional Rust Instructions:
+        1. Ensure compatibility with `Evcxr` rust kernel.
+        """
+
+
+class PromptManager:
+    # Alphabetic prefix of a Jupyter kernel name (`python3`, `xcpp17`,
+    # `julia-1.10`, `ir`, ...) -> prompt property.
+    _DISPATCH = {
+        "python": "_python_prompt",
+        "xcpp": "_cpp_prompt",
+        "cpp": "_cpp_prompt",
+        "r": "_r_prompt",
+        "ir": "_r_prompt",
+        "julia": "_julia_prompt",
+        "rust": "_rust_prompt",
+    }
+
+    def __init__(self, language, topic, path_info=None):
+        self._language = language.lower()
+        self._language_key = re.match(r"[a-z]*", self._language).group()
+        self.topic = topic
+        self.path_info = [(str(path), purpose) for path, purpose in (path_info or [])]
+        self._path_info_str = ", ".join(
+            f"Path: {path}, Purpose: {purpose}" for path, purpose in self.path_info
         )
 
+    def _get_base_prompt(self, language_name, code_block_syntax):
+        return _BASE_PROMPT_TEMPLATE.format_map(
+            {
+                "language_name": language_name,
+                "code_block_syntax": code_block_syntax,
+                "topic": self.topic,
+                "paths": self._path_info_str,
+            }
+        )
+
+    def build_prompt(self):
+        _prompt_attr = self._DISPATCH.get(self._language_key)
+        if _prompt_attr is None:
+            raise ValueError(f"Unsupported language: {self._language}")
+        return getattr(self, _prompt_attr)
+
+    @cached_property
+    def _python_prompt(self):
+        base = self._get_base_prompt("Python", "python")
+        return base
+
+    @cached_property
+    def _cpp_prompt(self):
+        base = self._get_base_prompt("C++", "cpp")
+        return base + _CPP_PROMPT_SUFFIX
+
+    @cached_property
     def _r_prompt(self):
         base = self._get_base_prompt("R", "r")
         return base
 
+    @cached_property
     def _julia_prompt(self):
         base = self._get_base_prompt("Julia", "julia")
         return base
 
+    @cached_property
     def _rust_prompt(self):
         base = self._get_base_prompt("Rust", "rust")
-        return (
-            base
-            + """
-        Additional Rust Instructions:
-        1. Ensure compatibility with `Evcxr` rust kernel.
-        """
-        )
+        return base + _RUST_PROMPT_SUFFIX
 
     def get_audio_prompt(self, code_snippet):
-        _prompt = f"""You are a coding tutor creating a voice narration script. Explain the following code snippet in a 
-            conversational, easy-to-follow way that works well for text-to-speech narration.
+        return _AUDIO_PROMPT_PREFIX + code_snippet + _AUDIO_PROMPT_SUFFIX
 
-            Code to explain:
+    def get_batch_audio_prompt(self, code_snippets):
+        _snippets = "\n".join(
+            f"""            Snippet {i + 1}:
             ```
-            {code_snippet}
+            {snippet}
             ```
+"""
+            for i, snippet in enumerate(code_snippets)
+        )
+        _prompt = f"""{_AUDIO_PROMPT_HEADER}
+            Write one explanation for each of the {len(code_snippets)} snippets below.
+            Return only a JSON array of {len(code_snippets)} strings, where the n-th string
+            explains the n-th snippet.
 
-            Guidelines for your explanation:
-            1. Start with a brief overview of what the code accomplishes
-            2. Break down the explanation into short, clear sentences
-            3. Avoid technical jargon unless necessary, and when used, briefly explain it
-            4. Use natural speech patterns (e.g., "Let's look at...", "Notice how...", "This part is important because...")
-            5. Keep sentences under 20 words for better TTS flow
-            6. Include pauses by using periods and commas strategically
-            7. Avoid special characters or symbols that might confuse TTS
-            8. Use concrete examples or analogies where helpful
-            9. End with a brief summary or key takeaway
-            10. Don't use any type of Quotes or Markdown formatting. Also, ignore unnecessary explanations
-            like `print` statements, `comments` etc.
-            11. Refer to variable names or special characters by their names. For example, `_` as `underscore`,
-            `is_variable` as `is underscore variable`.
-
-            Format your response as a natural, flowing explanation
-            """
+{_snippets}"""
         return _prompt
 
     def get_add_flowchart_prompt(self, code_snippet: str, flowchart_path: str) -> str:
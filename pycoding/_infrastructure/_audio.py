@@ -1,82 +1,307 @@
 from pathlib import Path
-import time
-from elevenlabs import VoiceSettings
+import asyncio
+import hashlib
+import json
+import os
+import random
+import shutil
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Callable, Literal
+from google.api_core import exceptions as google_exceptions
 from rich.console import Console
+from .._utils import parse_narrations
 
 _console = Console()
 
+# Only errors that are worth retrying. Anything else (bad request, auth,
+# permissions) propagates on the first attempt.
+_RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    # asyncio.wait_for raises asyncio.TimeoutError, which only became an
+    # alias of the builtin in Python 3.11.
+    asyncio.TimeoutError,
+    TimeoutError,
+)
+_LLM_TIMEOUT = 25  # Seconds per attempt.
+_LLM_MAX_ATTEMPTS = 4
+_LLM_MAX_BACKOFF = 16  # Seconds.
+_AUDIO_WRITE_BUFFER = 1 << 20  # Coalesce small network chunks into 1 MiB writes.
+
+_TTS_MODEL = "eleven_turbo_v2_5"
+_TTS_OUTPUT_FORMAT = "mp3_22050_32"
+
+
+@lru_cache(maxsize=None)
+def _voice_settings():
+    """Voice settings shared by every TTS request, built on first use."""
+    from elevenlabs import VoiceSettings
+
+    return VoiceSettings(
+        stability=0.1,
+        similarity_boost=1.0,
+        style=0.5,
+        use_speaker_boost=True,
+    )
+
+
+def _retry_delay(error, attempt):
+    """Seconds to wait before retrying a failed LLM request.
+
+    Only a quota error (ResourceExhausted) is the server asking us to slow
+    down: wait for its RetryInfo delay, or back off exponentially with jitter
+    if it carries none. Timeouts and unavailable errors retry straight away.
+    """
+    if not isinstance(error, google_exceptions.ResourceExhausted):
+        return 0.0
+
+    # Honour the server's RetryInfo when the quota error carries one.
+    for detail in getattr(error, "details", None) or []:
+        _delay = getattr(detail, "retry_delay", None)
+        if _delay is not None:
+            return _delay.seconds + _delay.nanos / 1e9
+
+    return min(_LLM_MAX_BACKOFF, 2**attempt) + random.uniform(0, 1)
+
 
 class AudioManager:
     """Manage functions to generate elevenlabs audio."""
 
     def __init__(
-        self, client, prompt_manager, model_object, voice_object, force_approve=False
+        self,
+        client,
+        prompt_manager,
+        model_object,
+        voice_object,
+        force_approve=False,
+        max_concurrency=5,
+        cache_policy: Literal["enabled", "replay", "disabled"] = "enabled",
+        http_client=None,
     ):
+        """`http_client` is the httpx.AsyncClient behind `client`, if any. It is
+        closed once audio generation has finished."""
         self.client = client
+        self.http_client = http_client
         self.prompt_manager = prompt_manager
         self.model_object = model_object
         self.voice_object = voice_object
         self.force_approve = force_approve
+        self.max_concurrency = max_concurrency
+        self.cache_policy = cache_policy
 
-    def _generate_single_audio(self, code_snippet: str, path: str):
-        """Generate audio for one snippet and save it."""
-        _prompt = self.prompt_manager.get_audio_prompt(code_snippet)
+    def _audio_cache_path(self, text: str, audio_path: Path) -> Path:
+        """Content-addressed location of the synthesized audio for `text`."""
+        _key = hashlib.sha256(
+            "\0".join(
+                (text, self.voice_object["voice_id"], _TTS_MODEL, _TTS_OUTPUT_FORMAT)
+            ).encode()
+        ).hexdigest()
+        return Path(audio_path) / "_cache" / f"{_key}.mp3"
 
-        while True:
+    def _approval_marker(self, narrations: list[str], audio_path: Path) -> Path:
+        """Sentinel file recording that this exact set of narrations was approved."""
+        _key = hashlib.sha256(json.dumps(narrations).encode()).hexdigest()
+        return Path(audio_path) / "_cache" / f"{_key}.approved"
+
+    async def _send_message(self, message: str) -> str:
+        """Send a message to the LLM, retrying transient failures with backoff."""
+        for attempt in range(_LLM_MAX_ATTEMPTS):
             try:
-                # Start a timer for the response
-                start_time = time.time()
-                _response = None
-
-                while time.time() - start_time < 25:  # 25 second timeout
-                    try:
-                        _response = self.model_object.send_message(_prompt)
-                        break
-                    except Exception as e:
-                        if time.time() - start_time >= 25:
-                            raise TimeoutError("Response timeout")
-                        time.sleep(1)  # Wait before retry
-                        continue
-
-                if _response is None:
-                    raise TimeoutError("Response timeout")
-
-                _text = _response.strip()
-                _console.log(_text)
-
-                if self.force_approve:
-                    break
-
-                _approve = input("Do you approve the explanation? (yes/no)")
-
-                if _approve == "yes":
-                    break
-                else:
-                    _feedback = input("What feedback do you have? ")
-                    self.model_object.send_message(_feedback)
-
-            except TimeoutError:
-                _console.log("[yellow]Response timed out, retrying...[/yellow]")
-                continue
-
-        # Generate audio for the response
-        response = self.client.text_to_speech.convert(
-            voice_id=self.voice_object["voice_id"],
-            output_format="mp3_22050_32",
-            text=_text,
-            model_id="eleven_turbo_v2_5",
-            voice_settings=VoiceSettings(
-                stability=0.1,
-                similarity_boost=1.0,
-                style=0.5,
-                use_speaker_boost=True,
-            ),
-        )
-
-        # Save the audio in chunks
-        with open(path, "wb") as f:
-            for chunk in response:
-                if chunk:
+                return await asyncio.wait_for(
+                    self.model_object.send_message_async(message),
+                    timeout=_LLM_TIMEOUT,
+                )
+            except _RETRYABLE_ERRORS as e:
+                if attempt == _LLM_MAX_ATTEMPTS - 1:
+                    raise
+                _delay = _retry_delay(e, attempt)
+                _console.log(
+                    f"[yellow]LLM request failed ({type(e).__name__}), retrying in {_delay:.1f}s...[/yellow]"
+                )
+                if _delay:
+                    await asyncio.sleep(_delay)
+
+    async def _draft_narrations(
+        self, code_snippets: list[str], message: str
+    ) -> list[str]:
+        """Request narrations for all snippets, one per snippet, in a single LLM call."""
+        _narrations = parse_narrations(await self._send_message(message))
+
+        if len(_narrations) != len(code_snippets):
+            _console.log(
+                "[yellow]Batched narrations didn't match the snippets, narrating one at a time...[/yellow]"
+            )
+            _narrations = [
+                (
+                    await self._send_message(
+                        self.prompt_manager.get_audio_prompt(snippet)
+                    )
+                ).strip()
+                for snippet in code_snippets
+            ]
+
+        for i, _text in enumerate(_narrations):
+            _console.log(f"Snippet {i}: {_text}")
+
+        return _narrations
+
+    async def _generate_single_audio(
+        self, text: str, path: Path, semaphore: asyncio.Semaphore, cache_path: Path
+    ) -> Path:
+        """Generate audio for one narration and save it, reusing cached audio."""
+        if self.cache_policy != "disabled" and cache_path.exists():
+            # copy2 keeps the mtime, so the snippet's length sidecar from an
+            # earlier run with the same narration stays valid.
+            shutil.copy2(cache_path, path)
+            return path
+
+        if self.cache_policy == "replay":
+            raise FileNotFoundError(
+                f"No cached audio for narration (replay mode): {text[:60]!r}"
+            )
+
+        async with semaphore:
+            # Generate audio for the response
+            response = self.client.text_to_speech.convert(
+                voice_id=self.voice_object["voice_id"],
+                output_format=_TTS_OUTPUT_FORMAT,
+                text=text,
+                model_id=_TTS_MODEL,
+                voice_settings=_voice_settings(),
+            )
+
+            # Save the audio in chunks. The buffered writer coalesces them,
+            # and an empty chunk is a no-op write.
+            with open(path, "wb", buffering=_AUDIO_WRITE_BUFFER) as f:
+                async for chunk in response:
                     f.write(chunk)
 
-        _console.log(f"Audio file saved at {path}")
+        if self.cache_policy == "enabled":
+            # Publish atomically so a concurrent or interrupted run never
+            # reads a partial cache entry.
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            _partial = cache_path.with_suffix(f".{os.getpid()}.part")
+            shutil.copyfile(path, _partial)
+            os.replace(_partial, cache_path)
+
+        return path
+
+    async def _generate_all_audio(
+        self,
+        code_snippets: list[str],
+        audio_path: Path,
+        on_ready: Callable[[int, Path], None] = None,
+    ):
+        """Generate all narrations, calling `on_ready(i, path)` as each is saved."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        _paths = [
+            Path(audio_path) / f"snippet_{i}.mp3" for i in range(len(code_snippets))
+        ]
+        _draft_paths = [path.with_suffix(".draft.mp3") for path in _paths]
+        _message = self.prompt_manager.get_batch_audio_prompt(code_snippets)
+
+        while True:
+            _narrations = await self._draft_narrations(code_snippets, _message)
+
+            # Synthesize speculatively while the user reviews the narrations,
+            # so an approval doesn't have to wait for TTS.
+            _tasks = [
+                asyncio.create_task(
+                    self._generate_single_audio(
+                        text,
+                        path,
+                        semaphore,
+                        self._audio_cache_path(text, audio_path),
+                    )
+                )
+                for text, path in zip(_narrations, _draft_paths)
+            ]
+
+            # Narrations approved on an earlier run don't need asking again.
+            _marker = self._approval_marker(_narrations, audio_path)
+            if self.force_approve or (
+                self.cache_policy != "disabled" and _marker.exists()
+            ):
+                break
+
+            _approve = await asyncio.to_thread(
+                input, "Do you approve the explanations? (yes/no)"
+            )
+
+            if _approve == "yes":
+                if self.cache_policy == "enabled":
+                    _marker.parent.mkdir(parents=True, exist_ok=True)
+                    _marker.touch()
+                break
+
+            # Don't serve the rejected narrations again on the next run.
+            self.model_object.discard_last_response()
+            for task in _tasks:
+                task.cancel()
+            await asyncio.gather(*_tasks, return_exceptions=True)
+            for path in _draft_paths:
+                path.unlink(missing_ok=True)
+
+            _feedback = await asyncio.to_thread(input, "What feedback do you have? ")
+            # Ask for a revision instead of re-sending the whole prompt.
+            _message = f"""{_feedback}
+
+            Rewrite all {len(code_snippets)} explanations with this feedback, again as a JSON array of strings."""
+
+        # Publish in snippet order, each as soon as it (and those before it)
+        # is synthesised.
+        for i, (task, draft, path) in enumerate(zip(_tasks, _draft_paths, _paths)):
+            await task
+            os.replace(draft, path)
+            _console.log(f"Audio file saved at {path}")
+            if on_ready is not None:
+                on_ready(i, path)
+
+        return _paths
+
+    def generate_audio_files(
+        self, code_snippets: list[str], audio_path: Path
+    ) -> list[Path]:
+        """Generate narration audio for all snippets, returning paths in snippet order."""
+        return asyncio.run(self._generate_and_close(code_snippets, audio_path))
+
+    def submit_audio_files(
+        self, code_snippets: list[str], audio_path: Path
+    ) -> list[Future]:
+        """Generate narration audio on a background thread.
+
+        Returns one future per snippet, resolving to its audio path as soon as
+        that snippet is saved, so callers can start on the first snippets while
+        later ones are still being synthesised.
+        """
+        _futures = [Future() for _ in code_snippets]
+
+        def _run():
+            try:
+                asyncio.run(
+                    self._generate_and_close(
+                        code_snippets,
+                        audio_path,
+                        lambda i, path: _futures[i].set_result(path),
+                    )
+                )
+            except BaseException as e:
+                for future in _futures:
+                    if not future.done():
+                        future.set_exception(e)
+
+        threading.Thread(target=_run, daemon=True).start()
+        return _futures
+
+    async def _generate_and_close(
+        self, code_snippets: list[str], audio_path: Path, on_ready=None
+    ):
+        try:
+            return await self._generate_all_audio(code_snippets, audio_path, on_ready)
+        finally:
+            # Pooled connections belong to this event loop, so release them
+            # before `asyncio.run` closes it.
+            if self.http_client is not None:
+                await self.http_client.aclose()
@@ -1,33 +1,307 @@
 import platform
-import time
 import subprocess
 import os
 import shutil
+import tempfile
+import time
 from pathlib import Path
 from rich.console import Console
-from moviepy import VideoFileClip, AudioFileClip, ImageClip, concatenate_videoclips
+import bisect
 import concurrent.futures
+import glob
+import hashlib
+import json
+from fractions import Fraction
 from typing import List, Tuple
-from .._utils import create_title
+from .._utils import create_title, _get_audio_length
 from pathlib import Path
 
 _console = Console()
 
+# Resolved once at import; recording is only supported on Linux (x11grab).
+_FFMPEG_PATH = shutil.which("ffmpeg")
+_FFPROBE_PATH = shutil.which("ffprobe")
+_SYSTEM = platform.system()
+
+_SEGMENTS_DIR = Path("pycoding_data/segments")
+_TITLE_DIR = Path("pycoding_data/title_files")
+
+# Every clip gets the same audio layout so the concat demuxer can stream-copy.
+_AUDIO_ARGS = ["-c:a", "aac", "-ar", "44100", "-ac", "2"]
+_TITLE_DURATION = 5
+# Codec parameters (extradata_hash covers SPS/PPS) that clips must share for
+# the concat demuxer to stream-copy them into one valid file.
+_SIGNATURE_ENTRIES = (
+    "stream=codec_type,codec_name,profile,level,width,height,pix_fmt,"
+    "time_base,r_frame_rate,sample_rate,channels,extradata_hash"
+)
+_RECORDER_STARTUP_CHECK = 0.5  # Seconds ffmpeg must survive to count as recording
+_FLOWCHART_DURATION = 10
+
+# ffmpeg arguments per H.264 encoder, as (global/input args, output args).
+# Hardware encoders are tried in this order before falling back to libx264.
+# Each converts x11grab's BGRA to 4:2:0 up front (VAAPI does so on upload).
+_H264_ENCODERS = {
+    "h264_nvenc": (
+        [],
+        ["-pix_fmt", "yuv420p", "-c:v", "h264_nvenc", "-preset", "p1"]
+        + ["-tune", "ll", "-rc", "cbr", "-b:v", "8M"],
+    ),
+    "h264_vaapi": (
+        ["-vaapi_device", "/dev/dri/renderD128"],
+        ["-vf", "format=nv12,hwupload", "-c:v", "h264_vaapi"],
+    ),
+    "h264_qsv": (
+        [],
+        ["-pix_fmt", "nv12", "-c:v", "h264_qsv", "-preset", "veryfast"],
+    ),
+    "libx264": (
+        [],
+        ["-pix_fmt", "yuv420p", "-c:v", "libx264", "-preset", "veryfast"]
+        + ["-tune", "zerolatency", "-crf", "23"],
+    ),
+}
+
+
+def _run_ffmpeg(*args):
+    """Run ffmpeg quietly; raises CalledProcessError carrying stderr on failure."""
+    subprocess.run(
+        [_FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-y", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _probe_video(video_path) -> Tuple[float, int, int, float]:
+    """Return (duration, width, height, fps) of a video file."""
+    _info = json.loads(
+        subprocess.run(
+            [_FFPROBE_PATH, "-v", "error", "-select_streams", "v:0"]
+            + ["-show_entries", "stream=width,height,r_frame_rate:format=duration"]
+            + ["-of", "json", str(video_path)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    )
+    _stream = _info["streams"][0]
+    return (
+        float(_info["format"]["duration"]),
+        int(_stream["width"]),
+        int(_stream["height"]),
+        float(Fraction(_stream["r_frame_rate"])),
+    )
+
+
+def _probe_keyframes(video_path) -> List[float]:
+    """Return the presentation times of the video's keyframes, in order."""
+    _out = subprocess.run(
+        [_FFPROBE_PATH, "-v", "error", "-select_streams", "v:0", "-skip_frame", "nokey"]
+        + ["-show_entries", "frame=pts_time", "-of", "csv=p=0", str(video_path)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return sorted(float(line) for line in _out.split() if line != "N/A")
+
+
+def _stream_signature(path) -> tuple:
+    """Return the stream parameters that must match to concat clips with -c copy."""
+    _info = json.loads(
+        subprocess.run(
+            [_FFPROBE_PATH, "-v", "error", "-show_data_hash", "CRC32"]
+            + ["-show_entries", _SIGNATURE_ENTRIES, "-of", "json", str(path)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    )
+    return tuple(tuple(sorted(stream.items())) for stream in _info["streams"])
+
+
+def _publish(path: Path, write):
+    """Create `path` by calling `write` on a uniquely named temp file beside it,
+    then renaming it into place, so concurrent writers never collide."""
+    _fd, _partial = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=path.suffix)
+    os.close(_fd)
+    try:
+        write(Path(_partial))
+        os.replace(_partial, path)
+    except BaseException:
+        Path(_partial).unlink(missing_ok=True)
+        raise
+
+
+def _keyframe_before(keyframes, t) -> float:
+    """Return the last keyframe time at or before `t` (0.0 if there is none)."""
+    i = bisect.bisect_right(keyframes, t + 1e-6)
+    return keyframes[i - 1] if i else 0.0
+
 
 class VideoManager:
     """Manage Jupyter Console dimensions and ffmpeg for video."""
 
+    _h264_encoder = None  # Selected once per process, see `_select_h264_encoder`.
+    _kmsgrab_device = None  # Probed once per process, see `_select_kmsgrab_device`.
+
     def __init__(self, platform_manager):
+        if _FFMPEG_PATH is None:
+            raise RuntimeError("FFmpeg is not installed or not in PATH.")
+        if _FFPROBE_PATH is None:
+            raise RuntimeError("FFprobe is not installed or not in PATH.")
+        if _SYSTEM != "Linux":
+            raise RuntimeError(f"Screen recording is not supported on {_SYSTEM}.")
+
         self.platform_manager = platform_manager
         self.ffmpeg_process = None
         self.recording_process = None
         self.fps = None
 
+    @staticmethod
+    def _encoder_works(encoder: str) -> bool:
+        """Check that an encoder can actually encode (driver and device present)."""
+        input_args, output_args = _H264_ENCODERS[encoder]
+        try:
+            subprocess.run(
+                [_FFMPEG_PATH, "-hide_banner", "-loglevel", "error", *input_args]
+                + ["-f", "lavfi", "-i", "color=size=256x256:duration=0.1"]
+                + [*output_args, "-f", "null", "-"],
+                capture_output=True,
+                check=True,
+                timeout=15,
+            )
+        except (OSError, subprocess.SubprocessError):
+            return False
+        return True
+
+    @classmethod
+    def _select_h264_encoder(cls) -> str:
+        """Return the fastest working H.264 encoder, probing ffmpeg only once."""
+        if cls._h264_encoder is None:
+            cls._h264_encoder = "libx264"
+            try:
+                _available = subprocess.run(
+                    [_FFMPEG_PATH, "-hide_banner", "-encoders"],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout
+            except (OSError, subprocess.SubprocessError):
+                _available = ""
+
+            for encoder in ("h264_nvenc", "h264_vaapi", "h264_qsv"):
+                if encoder in _available and cls._encoder_works(encoder):
+                    cls._h264_encoder = encoder
+                    break
+
+            _console.log(f"Using [cyan]{cls._h264_encoder}[/cyan] for screen recording")
+        return cls._h264_encoder
+
+    def _encoder_args(self, video_filter: str = None) -> Tuple[list, list]:
+        """Input and output args for the selected encoder, prepending `video_filter`."""
+        input_args, output_args = _H264_ENCODERS[self._select_h264_encoder()]
+        output_args = list(output_args)
+        if video_filter:
+            if "-vf" in output_args:
+                i = output_args.index("-vf") + 1
+                output_args[i] = f"{video_filter},{output_args[i]}"
+            else:
+                output_args = ["-vf", video_filter, *output_args]
+        return list(input_args), output_args
+
+    @classmethod
+    def _select_kmsgrab_device(cls):
+        """Return a DRM device kmsgrab can capture from, or None, probing only once.
+
+        Candidates are $PYCODING_DRM_DEVICE if set, else every /dev/dri/card*.
+        A one-frame test grab catches the usual failure, an ffmpeg binary
+        without CAP_SYS_ADMIN.
+        """
+        if cls._kmsgrab_device is None:
+            cls._kmsgrab_device = ""
+            _env_device = os.getenv("PYCODING_DRM_DEVICE")
+            _devices = [_env_device] if _env_device else sorted(
+                glob.glob("/dev/dri/card*")
+            )
+            for device in _devices:
+                try:
+                    subprocess.run(
+                        [_FFMPEG_PATH, "-hide_banner", "-loglevel", "error"]
+                        + ["-device", device, "-f", "kmsgrab", "-i", "-"]
+                        + ["-frames:v", "1"]
+                        + ["-vf", "hwmap=derive_device=vaapi,scale_vaapi=format=nv12"]
+                        + ["-c:v", "h264_vaapi", "-f", "null", "-"],
+                        capture_output=True,
+                        check=True,
+                        timeout=15,
+                    )
+                except (OSError, subprocess.SubprocessError):
+                    continue
+                cls._kmsgrab_device = device
+                break
+        return cls._kmsgrab_device or None
+
+    def _capture_args(self, capture, x, y, width, height):
+        """Return (input args, output args) to grab the region with `capture`."""
+        if capture == "kmsgrab":
+            # Grab DMA-BUFs straight from the scanout plane and keep them on
+            # the GPU through crop, colour conversion and encode.
+            return [
+                *["-device", self._select_kmsgrab_device(), "-f", "kmsgrab"],
+                *["-thread_queue_size", "1024", "-framerate", str(self.fps)],
+                *["-i", "-"],
+            ], [
+                "-vf",
+                f"hwmap=derive_device=vaapi,crop={width}:{height}:{x}:{y},"
+                "scale_vaapi=format=nv12",
+                *["-c:v", "h264_vaapi"],
+            ]
+
+        display = os.getenv("DISPLAY", ":0")
+        encoder_input_args, encoder_output_args = self._encoder_args()
+        return [
+            *encoder_input_args,
+            "-f",
+            "x11grab",
+            # Large input queue/buffer absorbs scheduler jitter on the grab
+            # side; skip probing and input buffering since x11grab is raw.
+            "-thread_queue_size",
+            "1024",
+            "-rtbufsize",
+            "100M",
+            "-probesize",
+            "32",
+            "-analyzeduration",
+            "0",
+            "-fpsprobesize",
+            "0",
+            "-fflags",
+            "nobuffer",
+            "-r",
+            str(self.fps),
+            "-video_size",
+            f"{width}x{height}",
+            "-i",
+            f"{display}.0+{x},{y}",
+        ], encoder_output_args
+
     def record_window(self, window_id: str, output_filename: str, fps: int = 20):
-        """Records a specific window region."""
-        self.platform_manager.make_fullscreen(window_id)
-        time.sleep(2)
-        coords = self.platform_manager.get_coordinates_using_id(window_id)
+        """Records a specific window region.
+
+        Capture path:
+        - Wayland session with a working VAAPI encoder and a DRM device that
+          passes a test grab: `kmsgrab` reads the scanout plane as DMA-BUFs,
+          so frames never leave the GPU. This needs CAP_SYS_ADMIN on the
+          ffmpeg binary (`setcap cap_sys_admin+ep $(which ffmpeg)`).
+        - Otherwise, or if kmsgrab exits right away: `x11grab` on $DISPLAY
+          (XWayland on Wayland sessions).
+
+        Returns the `time.monotonic()` timestamp at which the running recorder
+        was launched, which is where the video's timeline starts. Raises
+        RuntimeError if no capture could be started.
+        """
+        coords = self.platform_manager.fullscreen_and_geometry(window_id)
         if not coords:
             _console.log("[red]Error: Could not determine window coordinates.[/red]")
             return
@@ -42,81 +316,196 @@ class VideoManager:
         width -= 2
         height -= 2
 
-        system = platform.system()
+        # 4:2:0 chroma subsampling needs even dimensions
+        width -= width % 2
+        height -= height % 2
+
+        captures = ["x11grab"]
+        if (
+            os.getenv("XDG_SESSION_TYPE") == "wayland"
+            and self._select_h264_encoder() == "h264_vaapi"
+            and self._select_kmsgrab_device() is not None
+        ):
+            captures.insert(0, "kmsgrab")
+
+        for capture in captures:
+            capture_args, encoder_output_args = self._capture_args(
+                capture, x, y, width, height
+            )
 
-        # Ensure FFmpeg is installed
-        if not shutil.which("ffmpeg"):
-            _console.log("[red]Error: FFmpeg is not installed or not in PATH.[/red]")
-            return
+            # Build the FFmpeg command in correct order
+            ffmpeg_command = [
+                _FFMPEG_PATH,
+                *capture_args,
+                *encoder_output_args,
+                # A keyframe every second bounds how far `overlay_audio` moves
+                # its stream-copied cut points.
+                "-g",
+                str(self.fps),
+                # Let the software encoder use every core (ignored by hardware ones)
+                "-threads",
+                "0",
+            ]
 
-        # Platform-Specific Configuration
-        if system == "Linux":
-            screen_grab = "x11grab"  # More modern alternative to x11grab
-            display = os.getenv("DISPLAY", ":0")
-            screen_input = f"{display}.0+{x},{y}"
-            frame_rate_flag = "-r"
+            ffmpeg_command.extend(["-movflags", "+faststart"])
+            ffmpeg_command.extend(["-y", str(output_filename)])
 
-        else:
-            _console.log("[red]Error: Unsupported platform.[/red]")
-            return
+            _console.log(
+                f"Executing FFmpeg command:\n[cyan]{' '.join(ffmpeg_command)}[/cyan]"
+            )
 
-        # Build the FFmpeg command in correct order
-        ffmpeg_command = [
-            "ffmpeg",
-            "-f",
-            screen_grab,
-            frame_rate_flag,
-            str(self.fps),
-            "-video_size",
-            f"{width}x{height}",
-            "-i",
-            screen_input,
-            "-c:v",
-            "h264",
-            "-preset",
-            "ultrafast",
-        ]
+            # Start recording
+            try:
+                started_at = time.monotonic()
+                # stdin lets `stop_recording` ask ffmpeg to finish cleanly
+                self.ffmpeg_process = subprocess.Popen(
+                    ffmpeg_command, stdin=subprocess.PIPE
+                )
+            except Exception as e:
+                _console.log(f"[red]Error: Failed to start recording: {e}[/red]")
+                continue
 
-        if system == "Linux":
-            ffmpeg_command.extend(["-c:v", "libx264"])
-        else:
-            ffmpeg_command.extend(
-                [
-                    "-c:v",
-                    "mpeg4",
-                    "-q:v",
-                    "5",
-                ]
+            # A capture that can't open its device exits almost immediately.
+            try:
+                self.ffmpeg_process.wait(timeout=_RECORDER_STARTUP_CHECK)
+            except subprocess.TimeoutExpired:
+                break
+            _console.log(
+                f"[yellow]Warning: {capture} recording exited with code "
+                f"{self.ffmpeg_process.returncode}[/yellow]"
             )
+        else:
+            self.ffmpeg_process = None
+            raise RuntimeError("Could not start the screen recording.")
 
-        ffmpeg_command.extend(["-movflags", "+faststart"])
-        ffmpeg_command.extend(["-y", str(output_filename)])
-
-        _console.log(
-            f"Executing FFmpeg command:\n[cyan]{' '.join(ffmpeg_command)}[/cyan]"
-        )
+        self._prioritize_recorder(self.ffmpeg_process.pid)
+        return started_at
 
-        # Start recording
+    @staticmethod
+    def _prioritize_recorder(pid: int):
+        """Raise the recorder's priority over the cell code it is capturing."""
         try:
-            self.ffmpeg_process = subprocess.Popen(ffmpeg_command)
-
-        except Exception as e:
-            _console.log(f"[red]Error: Failed to start recording: {e}[/red]")
+            os.setpriority(os.PRIO_PROCESS, pid, -5)
+        except OSError:
+            pass  # Raising priority needs CAP_SYS_NICE; best effort only
 
-    def stop_recording(self):
-        """End the screen recording."""
+    def stop_recording(self, timeout: float = 5.0):
+        """End the screen recording, escalating if ffmpeg doesn't stop in time."""
         self.recording_process = False
-        if self.ffmpeg_process:
+        if not self.ffmpeg_process or self.ffmpeg_process.poll() is not None:
+            return
+
+        try:
+            # "q" makes ffmpeg flush the encoder and finalize the MP4
+            self.ffmpeg_process.communicate(b"q", timeout=timeout)
+        except (subprocess.TimeoutExpired, OSError):
             self.ffmpeg_process.terminate()
-            self.ffmpeg_process.wait()
+            try:
+                self.ffmpeg_process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                _console.log("[red]Error: ffmpeg did not stop, killing it.[/red]")
+                self.ffmpeg_process.kill()
+                self.ffmpeg_process.wait()
+
+    def _encode_still(self, image_path, output_path, duration, video_info):
+        """Encode an image as a silent clip matching the screen recording."""
+        _, width, height, fps = video_info
+        input_args, output_args = self._encoder_args(
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,format=yuv420p"
+        )
+        _run_ffmpeg(
+            *input_args,
+            *["-loop", "1", "-framerate", str(fps), "-t", str(duration)],
+            *["-i", str(image_path)],
+            *["-f", "lavfi", "-t", str(duration), "-i", "anullsrc=r=44100:cl=stereo"],
+            *output_args,
+            # Let the encoder pick its own frame/slice threading.
+            *["-threads", "0"],
+            *_AUDIO_ARGS,
+            "-shortest",
+            str(output_path),
+        )
+
+    def _title_clip(self, title, video_info) -> Path:
+        """Return the encoded title slide, reusing one from an earlier run."""
+        _, width, height, fps = video_info
+        _key = hashlib.blake2b(
+            f"{title}|{width}x{height}@{fps}|{self._select_h264_encoder()}".encode(),
+            digest_size=12,
+        ).hexdigest()
+        _clip = _TITLE_DIR / f"{_key}.mp4"
+
+        if not _clip.exists():
+            # Content-addressed, so identical titles are rendered only once
+            # and different titles can never collide on a file name.
+            _image_key = hashlib.blake2b(
+                f"{title}|{width}x{height}".encode(), digest_size=12
+            ).hexdigest()
+            _title_path = _TITLE_DIR / f"{_image_key}.png"
+            # Segments are processed concurrently and two cells may share a
+            # title, so both files are published atomically via temp files.
+            if not _title_path.exists():
+                _publish(
+                    _title_path,
+                    lambda partial: create_title(
+                        title, str(partial), image_size=(width, height)
+                    ),
+                )
+            _publish(
+                _clip,
+                lambda partial: self._encode_still(
+                    _title_path, partial, _TITLE_DURATION, video_info
+                ),
+            )
+
+        return _clip
+
+    def _cut_segment(
+        self, video_path, audio_file, start, end, output_path, hold=0.0, delay=0.0
+    ):
+        """Cut [start, end] from the recording and mux the narration onto it.
+
+        `start` must be a keyframe time: copied video can only begin at a
+        keyframe, and any other time would silently snap back to the previous
+        one. The narration starts `delay` seconds into the segment. The video
+        is stream-copied unless `hold` seconds of the last frame must be
+        appended, which only happens when narration outlasts the recording.
+        """
+        input_args, video_args = [], ["-c:v", "copy"]
+        if hold > 0:
+            input_args, video_args = self._encoder_args(
+                f"tpad=stop_mode=clone:stop_duration={hold:.3f}"
+            )
+            video_args += ["-threads", "0"]
+        _run_ffmpeg(
+            *input_args,
+            *["-ss", f"{start:.6f}", "-i", str(video_path)],
+            *["-i", str(audio_file)],
+            *["-t", f"{end - start + hold:.6f}"],
+            *["-map", "0:v:0", "-map", "1:a:0"],
+            *video_args,
+            # Delay narration to its start, then pad it with silence up to
+            # the segment length.
+            *["-af", f"adelay={int(delay * 1000)}:all=1,apad"],
+            *_AUDIO_ARGS,
+            # Start copied video at zero so every clip in the concat list has
+            # clean, aligned timestamps.
+            *["-avoid_negative_ts", "make_zero"],
+            str(output_path),
+        )
 
     def _process_video_segment(
         self, params: Tuple, title, flowchart_path=None
-    ) -> VideoFileClip:
-        """Process a single video segment with its audio and optional flowchart."""
-        key, timing, video, audio_path, base_start = params
+    ) -> List[Path]:
+        """Cut a single video segment with its audio and optional title/flowchart.
+
+        Returns the encoded clip paths in playback order.
+        """
+        key, timing, video_path, video_info, keyframes, audio_path, base_start = params
+        duration = video_info[0]
 
-        # Load audio file first to check existence and get duration
+        # Check the narration exists before cutting anything
         audio_file = audio_path / f"snippet_{key}.mp3"
         if not audio_file.exists():
             _console.log(
@@ -127,75 +516,91 @@ class VideoManager:
         try:
             # Calculate timestamps once
             start_time = timing["Start"] - base_start
-            end_time = min(timing["End"] - base_start, video.duration)
+            end_time = min(timing["End"] - base_start, duration)
 
-            if start_time >= video.duration:
+            if start_time >= duration:
                 _console.log(
                     f"[yellow]Warning: Clip {key} start time exceeds video duration[/yellow]"
                 )
                 return None
 
+            clips = []
+
             # Create title clip only if needed
-            title_clip = None
             if title is not None:
                 try:
-                    _title_path = os.path.join(
-                        str(Path("pycoding_data/title_files")),
-                        title.replace(" ", "") + ".png",
-                    )
-                    _title_path = create_title(
-                        title, _title_path, image_size=(video.size[0], video.size[1])
-                    )
-                    title_clip = ImageClip(_title_path, duration=5)
+                    clips.append(self._title_clip(title, video_info))
                 except Exception as e:
                     _console.log(
-                        f"[yellow]Warning: Failed to create title slide for segment {key}: {e}[/yellow]"
+                        f"[yellow]Warning: Failed to create title slide for segment {key}: {getattr(e, 'stderr', None) or e}[/yellow]"
                     )
 
-            # Load audio and video segments
-            audio_clip = AudioFileClip(str(audio_file))
-            video_segment = video.subclipped(start_time, end_time)
-
-            # Extend video duration if needed
-            if audio_clip.duration > video_segment.duration:
-                video_segment = video_segment.with_duration(audio_clip.duration)
-
-            # Combine video and audio
-            final_segment = video_segment.with_audio(audio_clip)
+            # Copied video starts at the keyframe before the cell. Cutting the
+            # end at the next cell's keyframe too makes consecutive segments
+            # tile the recording without repeating footage.
+            cut_start = _keyframe_before(keyframes, start_time)
+            cut_end = _keyframe_before(keyframes, end_time)
+
+            # Narration starts with the cell ("parallel") or once it has
+            # run ("after"), shifted by how far the cut moved back.
+            audio_delay = max(0.0, timing["Audio-Start"] - timing["Start"])
+            audio_delay += start_time - cut_start
+
+            # Extend the segment to cover the narration; past the end of the
+            # recording the last frame is held instead.
+            audio_end = cut_start + audio_delay + _get_audio_length(audio_file)
+            if end_time < duration and cut_end > cut_start and cut_end >= audio_end:
+                end_time = cut_end
+            end_time = min(max(end_time, audio_end), duration)
+            _segment = _SEGMENTS_DIR / f"segment_{key}.mp4"
+            self._cut_segment(
+                video_path,
+                audio_file,
+                cut_start,
+                end_time,
+                _segment,
+                hold=max(0.0, audio_end - duration),
+                delay=audio_delay,
+            )
+            clips.append(_segment)
 
             # Add flowchart if it exists
             if flowchart_path and os.path.exists(flowchart_path):
                 try:
-                    flowchart_clip = ImageClip(
-                        flowchart_path, duration=10
-                    )  # 10 seconds duration
-
-                    if title_clip:
-                        return concatenate_videoclips(
-                            [title_clip, final_segment, flowchart_clip],
-                            method="compose",
-                        )
-                    return concatenate_videoclips(
-                        [final_segment, flowchart_clip], method="compose"
+                    _flowchart_clip = _SEGMENTS_DIR / f"flowchart_{key}.mp4"
+                    self._encode_still(
+                        flowchart_path,
+                        _flowchart_clip,
+                        _FLOWCHART_DURATION,
+                        video_info,
                     )
+                    clips.append(_flowchart_clip)
                 except Exception as e:
                     _console.log(
-                        f"[yellow]Warning: Failed to add flowchart for segment {key}: {e}[/yellow]"
+                        f"[yellow]Warning: Failed to add flowchart for segment {key}: {getattr(e, 'stderr', None) or e}[/yellow]"
                     )
 
-            # Return original clip combination if no flowchart
-            if title_clip:
-                return concatenate_videoclips(
-                    [title_clip, final_segment], method="compose"
-                )
-            return final_segment
+            return clips
 
         except Exception as e:
-            _console.log(f"[red]Error processing clip {key}: {e}[/red]")
+            _console.log(
+                f"[red]Error processing clip {key}: {getattr(e, 'stderr', None) or e}[/red]"
+            )
             return None
 
-    def overlay_audio(self, time_dict, audio_path, titles=None, flowcharts=None):
-        """Overlays narration audio on the recorded screen video with optional flowcharts."""
+    def overlay_audio(
+        self, time_dict, audio_path, titles=None, flowcharts=None, base_start=None
+    ):
+        """Overlays narration audio on the recorded screen video with optional flowcharts.
+
+        Segments are cut from the recording with stream copy and joined with
+        ffmpeg's concat demuxer. The join is a stream copy too, unless the
+        clips' codec parameters differ, in which case it is re-encoded.
+
+        `base_start` is the `time.monotonic()` timestamp the recording started
+        at, as returned by `record_window`; it defaults to the first cell's
+        start.
+        """
         video_path = Path("pycoding_data/screen_recording.mp4")
         output_path = Path("pycoding_data/final_tutorial.mp4")
 
@@ -205,23 +610,31 @@ class VideoManager:
             _console.log("[red]Error: Screen recording file not found![/red]")
             return
 
-        video = VideoFileClip(str(video_path))
-        base_start = time_dict["0"]["Start"]
+        video_info = _probe_video(video_path)
+        keyframes = _probe_keyframes(video_path)
+        if base_start is None:
+            base_start = time_dict["0"]["Start"]
 
         if self.titles is not None and len(self.titles) != len(time_dict):
             _console.log(
                 f"[yellow]Warning: Number of titles ({len(self.titles)}) doesn't match number of code segments ({len(time_dict)})[/yellow]"
             )
 
+        os.makedirs(_SEGMENTS_DIR, exist_ok=True)
+
         # Prepare parameters for parallel processing
         process_params = [
-            (key, timing, video, audio_path, base_start)
+            (key, timing, video_path, video_info, keyframes, audio_path, base_start)
             for key, timing in sorted(time_dict.items(), key=lambda x: int(x[0]))
         ]
 
-        # Process video segments in parallel while maintaining order
-        final_clips: List[VideoFileClip] = []
-        with concurrent.futures.ThreadPoolExecutor() as executor:
+        # Process video segments in parallel while maintaining order. Workers
+        # only wait on ffmpeg subprocesses, so threads are not GIL-bound; half
+        # the cores each leaves room for ffmpeg's own threading.
+        final_clips: List[Path] = []
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, (os.cpu_count() or 2) // 2)
+        ) as executor:
             futures_with_index = [
                 (
                     i,
@@ -241,30 +654,40 @@ class VideoManager:
             for i, future in sorted(futures_with_index, key=lambda x: x[0]):
                 result = future.result()
                 if result is not None:
-                    final_clips.append(result)
+                    final_clips.extend(result)
 
-        # Concatenate all clips
+        # Join all clips, without re-encoding when their parameters match
         if final_clips:
-            final_video = concatenate_videoclips(final_clips)
-
-            # Write final video
+            _concat_list = _SEGMENTS_DIR / "concat.txt"
+            _concat_list.write_text(
+                "".join(
+                    "file '{}'\n".format(str(clip.resolve()).replace("'", "'\\''"))
+                    for clip in final_clips
+                )
+            )
             try:
-                final_video.write_videofile(
+                input_args, codec_args = [], ["-c", "copy"]
+                if len({_stream_signature(clip) for clip in final_clips}) > 1:
+                    # Title/flowchart clips are encoded separately (and titles
+                    # may be cached from an earlier run), so their SPS/PPS or
+                    # timebase can differ from the recording's.
+                    _console.log(
+                        "[yellow]Clips differ in codec parameters, re-encoding the final video...[/yellow]"
+                    )
+                    input_args, codec_args = self._encoder_args()
+                    codec_args += ["-threads", "0", *_AUDIO_ARGS]
+                _run_ffmpeg(
+                    *input_args,
+                    *["-f", "concat", "-safe", "0", "-i", str(_concat_list)],
+                    *codec_args,
+                    *["-movflags", "+faststart"],
                     str(output_path),
-                    codec="libx264",
-                    fps=video.fps,
-                    audio_codec="aac",
-                    threads=max(
-                        1, os.cpu_count() - 1
-                    ),  # Use multiple threads for encoding
                 )
-            except Exception as e:
-                _console.log(f"[red]Error writing final video: {e}[/red]")
-            finally:
-                final_video.close()
+            except subprocess.CalledProcessError as e:
+                _console.log(f"[red]Error writing final video: {e.stderr}[/red]")
 
         # Clean up
-        video.close()
+        shutil.rmtree(_SEGMENTS_DIR, ignore_errors=True)
         video_path.unlink(missing_ok=True)
         _console.log(f"[yellow]Deleted {video_path} after processing.[/yellow]")
         _console.log(f"[green]Final tutorial saved to {output_path}[/green]")
@@ -1,39 +1,77 @@
+import select
 import subprocess
 import time
 from threading import Event
 from dataclasses import dataclass
 
+import Xlib.threaded  # noqa: F401  (makes the shared Display thread-safe)
+from Xlib import X, XK
+from Xlib.display import Display
+from Xlib.error import XError
+from Xlib.ext import xtest
+from Xlib.protocol import event as xevent
+
 
 @dataclass
 class Delays:
     """Configuration class for various delay values used in platform operations"""
 
-    matplotlib_window_check: float = 1.0  # Delay between checks for matplotlib window
+    matplotlib_window_check: float = 1.0  # Max wait for X events between stop checks
     matplotlib_window_close: float = 11.0  # Delay before closing matplotlib window
+    geometry_poll: float = 0.05  # Delay between geometry checks after fullscreen
+    fullscreen_timeout: float = 2.0  # Max wait for fullscreen to be applied
 
 
 class LinuxManager:
+    """Window management over a single, shared X connection (EWMH)."""
+
     def __init__(self, language):
-        # TODO, Check if `wmctrl` and `xwininfo` are present or not.
         self.language = language
         self.delays = Delays()
 
+        self._display = Display()
+        self._root = self._display.screen().root
+        self._client_list = self._display.intern_atom("_NET_CLIENT_LIST")
+
+    def _window(self, window_id):
+        """Resolve an X window id (int or "0x..." string) to a window object."""
+        if isinstance(window_id, str):
+            window_id = int(window_id, 0)
+        return self._display.create_resource_object("window", window_id)
+
+    def _clients(self):
+        """Return the windows managed by the window manager, oldest first."""
+        clients = self._root.get_full_property(self._client_list, X.AnyPropertyType)
+        return [self._window(window_id) for window_id in clients.value] if clients else []
+
+    def _window_name(self, window):
+        """Return the EWMH (UTF-8) title of a window, falling back to WM_NAME."""
+        name = window.get_full_property(
+            self._display.intern_atom("_NET_WM_NAME"),
+            self._display.intern_atom("UTF8_STRING"),
+        )
+        if name:
+            return name.value.decode(errors="replace")
+        return window.get_wm_name() or ""
+
+    def _send_wm_message(self, window, message_type, data):
+        """Send an EWMH client message about `window` to the window manager."""
+        message = xevent.ClientMessage(
+            window=window,
+            client_type=self._display.intern_atom(message_type),
+            data=(32, data),
+        )
+        self._root.send_event(
+            message, event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask
+        )
+        self._display.flush()
+
     def get_window_id(self):
         try:
-            # Run wmctrl -lp and capture its output
-            result = subprocess.run(
-                ["wmctrl", "-lp"], stdout=subprocess.PIPE, text=True, check=True
-            )
-            output = result.stdout
-
-            # Search for the line containing 'Terminal' (Where Jupyter is running)
-            for line in output.splitlines():
-                if "Terminal" in line:
-                    # Extract the window ID (1st field in the output)
-                    parts = line.split()
-
-                    if len(parts) > 0:
-                        return parts[0]  # Window ID is in the 1st column
+            # Look for the 'Terminal' window (Where Jupyter is running)
+            for window in self._clients():
+                if "Terminal" in self._window_name(window):
+                    return window.id
 
             return None  # If no match was found
 
@@ -45,26 +83,12 @@ class LinuxManager:
         assert window_id is not None
 
         try:
-            # Use xwininfo to get details of the window by ID
-            result = subprocess.run(
-                ["xwininfo", "-id", str(window_id)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
-
-            if result.returncode != 0:
-                print(f"Error: {result.stderr.strip()}")
-                return None
+            window = self._window(window_id)
+            geometry = window.get_geometry()
+            # Absolute position of the window's origin, as xwininfo reports it
+            origin = self._root.translate_coords(window, 0, 0)
 
-            # Parse xwininfo output
-            output = result.stdout
-            x = int(output.split("Absolute upper-left X:")[1].split()[0])
-            y = int(output.split("Absolute upper-left Y:")[1].split()[0])
-            width = int(output.split("Width:")[1].split()[0])
-            height = int(output.split("Height:")[1].split()[0])
-
-            return x, y, width, height
+            return origin.x, origin.y, geometry.width, geometry.height
 
         except Exception as e:
             print(f"Error fetching window coordinates: {e}")
@@ -74,58 +98,124 @@ class LinuxManager:
         """Resizes the specified window to 1920x1080 (16:9) aspect ratio
         as needed by popular platforms like Udemy, YouTube etc."""
         try:
-            # Execute wmctrl command to resize the window
-            subprocess.run(
-                ["wmctrl", "-i", "-r", window_id, "-b", "toggle,fullscreen"], check=True
+            # _NET_WM_STATE toggle (2) of the fullscreen state
+            self._send_wm_message(
+                self._window(window_id),
+                "_NET_WM_STATE",
+                [
+                    2,
+                    self._display.intern_atom("_NET_WM_STATE_FULLSCREEN"),
+                    0,
+                    1,
+                    0,
+                ],
             )
             print(f"Window {window_id} resized to 1920x1080 (16:9)")
-        except subprocess.CalledProcessError as e:
+        except Exception as e:
             print(f"Error resizing window {window_id}: {e}")
 
-    def open_jupyter_console(self):
+    def fullscreen_and_geometry(self, window_id):
+        """Make the window fullscreen and return its (x, y, width, height).
+
+        Polls the geometry until the window manager has resized the window
+        and it is stable across two reads, rather than sleeping blindly.
+        """
+        before = self.get_coordinates_using_id(window_id)
+        self.make_fullscreen(window_id)
+
+        geometry = before
+        deadline = time.monotonic() + self.delays.fullscreen_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.delays.geometry_poll)
+            current = self.get_coordinates_using_id(window_id)
+            if current is not None and current != before and current == geometry:
+                return current
+            geometry = current
+
+        return self.get_coordinates_using_id(window_id)
+
+    def send_hotkey(self, *keys):
+        """Press `keys` (X keysym names, e.g. "Alt_L", "Return") as one chord.
+
+        All press/release events are queued through XTest and sent to the
+        server in a single flush.
+        """
+        keycodes = [
+            self._display.keysym_to_keycode(XK.string_to_keysym(key)) for key in keys
+        ]
+        for keycode in keycodes:
+            xtest.fake_input(self._display, X.KeyPress, keycode)
+        for keycode in reversed(keycodes):
+            xtest.fake_input(self._display, X.KeyRelease, keycode)
+        self._display.sync()
+
+    def open_jupyter_console(self, connection_file=None):
+        """Open a Jupyter console, attached to a running kernel if given."""
+        _kernel_args = (
+            ["--existing", connection_file]
+            if connection_file
+            else ["--kernel", self.language]
+        )
         proc = subprocess.Popen(
-            ["gnome-terminal", "--", "jupyter", "console", "--kernel", self.language],
+            ["gnome-terminal", "--", "jupyter", "console", *_kernel_args],
         )
         return proc
 
     def detect_and_close_matplotlib_window(self, event):
-        """Continuously detects and closes Matplotlib windows until event is set."""
-        event.set()  # Indicate that monitoring is active
-
-        try:
-            while not event.is_set():  # Keep checking until manually stopped
-                result = subprocess.run(
-                    ["wmctrl", "-lp"], stdout=subprocess.PIPE, text=True, check=True
+        """Continuously detects and closes Matplotlib windows until event is set.
+
+        Rather than polling, this subscribes to changes of the root window's
+        `_NET_CLIENT_LIST`, so the X server reports new windows.
+        """
+        self._root.change_attributes(event_mask=X.PropertyChangeMask)
+        self._display.flush()
+
+        clients_changed = True  # Scan windows that already exist
+        while not event.is_set():  # Keep checking until manually stopped
+            if not clients_changed:
+                select.select(
+                    [self._display.fileno()],
+                    [],
+                    [],
+                    self.delays.matplotlib_window_check,
                 )
-                output = result.stdout
-                window_found = False
-
-                for line in output.splitlines():
+            try:
+                while self._display.pending_events():
+                    x_event = self._display.next_event()
                     if (
-                        "Image Viewer" in line
-                    ):  # Adjust based on actual Matplotlib window title
-                        window_found = True
-                        parts = line.split()
-                        if len(parts) > 0:
-                            window_id = parts[0]
-                            time.sleep(self.delays.matplotlib_window_close)
-                            self.close_window_by_id(window_id)
-
-                if window_found:
-                    event.clear()  # Reset only if a window was found & closed
-
-                time.sleep(
-                    self.delays.matplotlib_window_check
-                )  # Small pause before next check
-
-        except Exception as e:
-            print(f"Error detecting Matplotlib window: {e}")
-
-        finally:
-            event.set()  # Ensure event is always set when the loop exits
-
-    def close_window_by_id(self, window_id: str):
+                        x_event.type == X.PropertyNotify
+                        and x_event.atom == self._client_list
+                    ):
+                        clients_changed = True
+
+                if clients_changed:
+                    clients_changed = False
+                    self._close_matplotlib_windows(event)
+
+            except Exception as e:
+                # Keep watching; one failed scan shouldn't end monitoring.
+                print(f"Error detecting Matplotlib window: {e}")
+                event.wait(self.delays.matplotlib_window_check)
+
+    def _close_matplotlib_windows(self, event):
+        """Close every managed window whose title marks it as a Matplotlib figure."""
+        for window in self._clients():
+            try:
+                # Adjust based on actual Matplotlib window title
+                if "Image Viewer" not in self._window_name(window):
+                    continue
+            except XError:
+                continue  # Window vanished while we were looking
+
+            # Leave the figure up for a while, but close it at once on stop.
+            event.wait(self.delays.matplotlib_window_close)
+            self.close_window_by_id(window.id)
+
+    def close_window_by_id(self, window_id):
         try:
-            subprocess.run(["wmctrl", "-i", "-c", window_id], check=True)
+            # Ask the window manager to close it, as `wmctrl -c` would
+            self._send_wm_message(
+                self._window(window_id), "_NET_CLOSE_WINDOW", [X.CurrentTime, 1, 0, 0, 0]
+            )
         except Exception as e:
             print(f"Error closing window {window_id}: {e}")
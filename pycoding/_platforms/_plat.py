@@ -16,13 +16,19 @@ class PlatformManager:
     def get_coordinates_using_id(self, window_id):
         return self._platform.get_coordinates_using_id(window_id=window_id)
 
-    def open_jupyter_console(self):
-        return self._platform.open_jupyter_console()
+    def open_jupyter_console(self, connection_file=None):
+        return self._platform.open_jupyter_console(connection_file=connection_file)
 
     def make_fullscreen(self, window_id):
         return self._platform.make_fullscreen(window_id=window_id)
 
-    def close_window_by_id(self, window_id: str):
+    def fullscreen_and_geometry(self, window_id):
+        return self._platform.fullscreen_and_geometry(window_id=window_id)
+
+    def send_hotkey(self, *keys):
+        return self._platform.send_hotkey(*keys)
+
+    def close_window_by_id(self, window_id: int):
         return self._platform.close_window_by_id(window_id=window_id)
 
     def detect_and_close_matplotlib_window(self, event):
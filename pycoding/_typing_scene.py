@@ -1,16 +1,14 @@
 # External Libs.
 import platform
-import pyautogui
-from pynput.keyboard import Controller
 import time
 import os
 import threading
 from pathlib import Path
 from threading import Event
 from rich.console import Console
-from elevenlabs.client import ElevenLabs
 import subprocess
-from typing import Literal
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Literal
 from contextlib import contextmanager
 
 # Internal Libs.
@@ -19,23 +17,32 @@ from ._infrastructure._video import VideoManager
 from ._infrastructure._ai import PromptManager, GoogleGenAI
 from ._utils import (
     parse_code,
-    _is_jupyter_idle,
+    _drain_iopub,
+    _wait_for_execution,
+    _poll_until_idle,
     _get_audio_length,
     needs_flowchart,
 )
 from ._platforms import PlatformManager
-from .scene import CodingScene
+from .scene import make_scene_factory
+
+if TYPE_CHECKING:
+    from pynput.keyboard import Controller
 
 _console = Console()
 
+# Concurrent TTS requests, and pooled HTTP connections to serve them.
+_TTS_CONCURRENCY = 5
+
 
 class TimingConfig:
     """Configuration for various timing constants used in the tutorial creation."""
 
     JUPYTER_STARTUP_DELAY = 6.0
     CHAR_TYPE_DELAY = 0.1
-    IDLE_CHECK_INTERVAL = 0.5
+    IDLE_CHECK_INTERVAL = 0.1
     POST_CELL_PADDING = 10.0
+    IDLE_CONFIRMED_PADDING = 0.5  # When the kernel itself reported the cell done
     EXECUTION_TIMEOUT = 60.0  # Move timeout duration here
     RECORDING_FPS = 20  # Move FPS value here
 
@@ -71,6 +78,13 @@ class CodingTutorial:
         rust, xcpp17 (for C++), bash.
     force_approve : boolean
         Approve LLM response by default or not. Defaults to False.
+    typing_delay : float
+        Seconds per typed character; 0 types each line instantly. Defaults to
+        `TimingConfig.CHAR_TYPE_DELAY`.
+    cache_policy : str
+        Reuse of synthesized narration audio across runs: `enabled` (read and
+        write the cache), `replay` (only read it, fail on a miss) or `disabled`.
+        Defaults to `enabled`.
     """
 
     def __init__(
@@ -85,6 +99,8 @@ class CodingTutorial:
         force_approve: bool = False,
         add_titles: bool = False,
         add_flowchart: bool = False,
+        typing_delay: float = TimingConfig.CHAR_TYPE_DELAY,
+        cache_policy: Literal["enabled", "replay", "disabled"] = "enabled",
     ) -> None:
         """Initialize the CodingTutorial class.
 
@@ -97,6 +113,8 @@ class CodingTutorial:
             narration_type: When to play narration ('after' or 'parallel')
             language: Programming language for the tutorial
             force_approve: Whether to skip manual approval steps
+            typing_delay: Seconds per typed character (0 for instant typing)
+            cache_policy: Narration audio caching ('enabled', 'replay' or 'disabled')
 
         Raises:
             ValueError: If invalid parameters are provided
@@ -118,25 +136,46 @@ class CodingTutorial:
         self.model_object.start_chat()
         os.environ["ELEVEN_API_KEY"] = self.voice_object["API_KEY"]
 
-        self._client = ElevenLabs(
+        # GUI automation, TTS and kernel libraries are imported where they are
+        # used, so importing the package (or `--help`) needs no display.
+        import httpx
+        from elevenlabs.client import AsyncElevenLabs
+
+        # One pool sized to the TTS concurrency, so every request after the
+        # first few reuses a kept-alive TLS connection. AudioManager closes it.
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=_TTS_CONCURRENCY,
+                max_keepalive_connections=_TTS_CONCURRENCY,
+            ),
+            timeout=60.0,
+        )
+        self._client = AsyncElevenLabs(
             api_key=eleven_labs_api_key,
+            httpx_client=self._http_client,
         )
 
         os.makedirs(Path("pycoding_data/audio_files"), exist_ok=True)
         self.audio_path = Path("pycoding_data/audio_files")
         self.recording_process = None
+        self._window_id = None  # Jupyter console window, set per session
+        self._recording_start = None  # Monotonic time the recorder was launched
         self.path_info = path_info
         self.narration_type = narration_type
         self.language = language
         self.force_approve = force_approve
         self.add_titles = add_titles
         self.add_flowchart = add_flowchart
+        self.typing_delay = typing_delay
+        self._scene_factory = make_scene_factory(self.language, self.typing_delay)
 
         if self.add_titles:
             os.makedirs(Path("pycoding_data/title_files"), exist_ok=True)
             self.title_list = []  # Initialize as empty list
 
-        self._prompt_manager = PromptManager(language=self.language, topic=self.topic)
+        self._prompt_manager = PromptManager(
+            language=self.language, topic=self.topic, path_info=self.path_info
+        )
         self._platform_manager = PlatformManager(platform.system(), self.language)
 
         self.time_dict = {}
@@ -146,9 +185,14 @@ class CodingTutorial:
         self.audio_manager = AudioManager(
             self._client,
             self._prompt_manager,
-            self.model_object,
+            # Narration may be drafted on a worker thread while titles and
+            # flowcharts are requested here, so it gets its own chat.
+            self.model_object.fork_chat(),
             self.voice_object,
             force_approve,
+            max_concurrency=_TTS_CONCURRENCY,
+            cache_policy=cache_policy,
+            http_client=self._http_client,
         )
 
         # Add flowchart storage only if needed
@@ -177,40 +221,39 @@ class CodingTutorial:
         """Retrieves the window ID of the active Jupyter console."""
         return self._platform_manager.get_window_id()
 
-    def _get_window_coordinates_by_id(self, window_id: str):
+    def _get_window_coordinates_by_id(self, window_id: int):
         """Gets the screen coordinates of a window given its ID."""
         return self._platform_manager.get_coordinates_using_id(window_id)
 
-    def _start_background_threads(self, window_id: str):
-        """Initializes and starts recording and matplotlib monitoring threads."""
-        recording_thread = threading.Thread(
-            target=self.video_manager.record_window,
-            args=(window_id, Path("pycoding_data/screen_recording.mp4"), 20),
-            daemon=True,  # Make thread daemon
+    def _start_recording(self):
+        """Fullscreen the console and start recording it.
+
+        Called right before the first cell is typed, so neither console
+        start-up nor narration synthesis ends up in the recording, and the
+        first cell's timestamp lines up with the start of the video.
+        Returns the timestamp at which the recorder was launched.
+        """
+        return self.video_manager.record_window(
+            self._window_id,
+            Path("pycoding_data/screen_recording.mp4"),
+            TimingConfig.RECORDING_FPS,
         )
-        recording_thread.start()
 
+    def _start_matplotlib_thread(self) -> threading.Thread:
+        """Initializes and starts the matplotlib monitoring thread."""
         matplotlib_thread = threading.Thread(
             target=self._platform_manager.detect_and_close_matplotlib_window,
             args=(self.matplotlib_event,),
             daemon=True,  # Make thread daemon
         )
         matplotlib_thread.start()
-        return recording_thread, matplotlib_thread
-
-    def _join_threads(
-        self, recording_thread: threading.Thread, matplotlib_thread: threading.Thread
-    ):
-        """Waits for background threads to complete execution."""
-        # Wait for threads with timeout
-        recording_thread.join(timeout=5)
+        return matplotlib_thread
+
+    def _join_matplotlib_thread(self, matplotlib_thread: threading.Thread):
+        """Waits for the matplotlib monitoring thread to finish."""
         matplotlib_thread.join(timeout=5)
 
-        # Log warning if threads didn't complete
-        if recording_thread.is_alive():
-            _console.log(
-                "[yellow]Warning: Recording thread did not exit cleanly[/yellow]"
-            )
+        # Log warning if the thread didn't complete
         if matplotlib_thread.is_alive():
             _console.log(
                 "[yellow]Warning: Matplotlib thread did not exit cleanly[/yellow]"
@@ -281,11 +324,25 @@ class CodingTutorial:
             return None
 
     def _type_code(
-        self, code_cells: list[str], keyboard: Controller, proc: subprocess.Popen
+        self,
+        code_cells: list[str],
+        audio_length: Callable[[int], float],
+        keyboard: "Controller",
+        wait_for_cell: Callable[[float], bool],
+        idle_padding: float = TimingConfig.POST_CELL_PADDING,
+        before_cell: Callable[[], None] | None = None,
     ) -> dict[str, dict[str, float]]:
         """Types and executes code cells while managing timing and audio synchronization."""
         time_dict = {}
-        prev_end_time = time.time()
+
+        # Loop invariants, bound once rather than looked up for every cell
+        now = time.monotonic
+        parallel = self.narration_type == "parallel"
+        timeout = TimingConfig.EXECUTION_TIMEOUT
+        send_hotkey = self._platform_manager.send_hotkey
+
+        self._recording_start = self._start_recording()
+        prev_end_time = now()
 
         for i, cell in enumerate(code_cells):
             if self.add_titles:
@@ -313,50 +370,44 @@ class CodingTutorial:
 
             _splitted_cell = cell.splitlines()
 
+            if before_cell is not None:
+                before_cell()
+
             # Track the start of actual code execution
-            execution_start = time.time()
+            execution_start = now()
 
-            _cell = CodingScene(
-                _splitted_cell, self.language, TimingConfig.CHAR_TYPE_DELAY
-            )
+            _cell = self._scene_factory(_splitted_cell)
             _cell.type_code()
 
-            pyautogui.hotkey("alt", "enter")
-
-            # Wait for execution with timeout
-            timeout_start = time.time()
-            timeout_duration = 60  # 1 minute timeout
-            while not _is_jupyter_idle(proc):
-                if time.time() - timeout_start > timeout_duration:
-                    _console.log(f"Warning: Cell {i} execution timed out")
-                    break
-                time.sleep(TimingConfig.IDLE_CHECK_INTERVAL)
+            send_hotkey("Alt_L", "Return")
 
-            if not self.matplotlib_event.is_set():
-                self.matplotlib_event.clear()
+            # Wait for the kernel to report the cell finished, with timeout.
+            # A timed-out cell may still be printing, so keep the full pad.
+            if wait_for_cell(timeout):
+                padding = idle_padding
+            else:
+                _console.log(f"Warning: Cell {i} execution timed out")
+                padding = TimingConfig.POST_CELL_PADDING
 
-            _end = time.time()
+            _end = now()
             code_exec_time = _end - execution_start
 
-            __cur_audio_path = self.audio_path / f"snippet_{i}.mp3"
-            self.audio_manager._generate_single_audio(cell, __cur_audio_path)
-            _audio_length = _get_audio_length(__cur_audio_path)
+            # Needed only once the cell has run, so narration still being
+            # synthesised overlaps the typing of this and earlier cells.
+            _audio_length = audio_length(i)
 
-            if self.narration_type == "parallel":
+            if parallel:
                 audio_start = _start
                 # Use max to ensure we don't cut off either code or audio
-                final_end = (
-                    _start
-                    + max(code_exec_time, _audio_length)
-                    + TimingConfig.POST_CELL_PADDING
-                )
-                padding_time = final_end - (_start + code_exec_time)
-                if padding_time > 0:
-                    time.sleep(padding_time)
+                final_end = _start + max(code_exec_time, _audio_length) + padding
 
             else:
                 audio_start = _end
-                final_end = _end + _audio_length + TimingConfig.POST_CELL_PADDING
+                final_end = _end + _audio_length + padding
+
+            # Hold the screen until the cell's absolute deadline, so sleep
+            # jitter doesn't accumulate and the next cell starts at `final_end`.
+            time.sleep(max(0.0, final_end - now()))
 
             time_dict[str(i)]["Audio-Start"] = audio_start
             time_dict[str(i)]["End"] = final_end
@@ -367,27 +418,72 @@ class CodingTutorial:
                 self.flowchart_list.append(flowchart_path)
                 _console.log(f"Flowchart generated for snippet {i}: {flowchart_path}")
 
-            prev_end_time = final_end
+            # If waiting on narration or the flowchart overran `final_end`,
+            # start the next cell now; the idle footage in between is dropped.
+            prev_end_time = max(final_end, now())
 
         return time_dict
 
+    def _start_kernel(self):
+        """Start the kernel and a client watching its iopub status messages.
+
+        The console attaches to this kernel as a second client. Returns
+        (None, None) if the kernel can't be started this way, in which case
+        cell completion falls back to CPU polling.
+        """
+        from jupyter_client import KernelManager
+
+        kernel_manager = KernelManager(kernel_name=self.language)
+        try:
+            kernel_manager.start_kernel()
+            kernel_client = kernel_manager.client()
+            kernel_client.start_channels()
+            kernel_client.wait_for_ready(timeout=TimingConfig.EXECUTION_TIMEOUT)
+        except Exception as e:
+            _console.log(
+                f"[yellow]Warning: Could not connect to the {self.language} kernel ({e}), polling for idle instead[/yellow]"
+            )
+            if kernel_manager.has_kernel:
+                kernel_manager.shutdown_kernel(now=True)
+            return None, None
+        return kernel_manager, kernel_client
+
     @contextmanager
     def _recording_session(self):
         """Context manager for handling recording session setup and cleanup."""
+        from pynput.keyboard import Controller
+
         keyboard = Controller()
-        proc = self._platform_manager.open_jupyter_console()
+
+        kernel_manager, kernel_client = self._start_kernel()
+        proc = self._platform_manager.open_jupyter_console(
+            kernel_manager.connection_file if kernel_manager else None
+        )
         time.sleep(TimingConfig.JUPYTER_STARTUP_DELAY)
 
-        window_id = self._get_jupyter_window_id()
-        recording_thread, matplotlib_thread = self._start_background_threads(window_id)
+        # Only the kernel's own idle status guarantees the cell's output has
+        # been flushed; the CPU heuristic keeps the full padding.
+        if kernel_client is not None:
+            wait_for_cell = partial(_wait_for_execution, kernel_client)
+            idle_padding = TimingConfig.IDLE_CONFIRMED_PADDING
+            before_cell = partial(_drain_iopub, kernel_client)
+        else:
+            wait_for_cell = partial(
+                _poll_until_idle, proc, interval=TimingConfig.IDLE_CHECK_INTERVAL
+            )
+            idle_padding = TimingConfig.POST_CELL_PADDING
+            before_cell = None
+
+        window_id = self._window_id = self._get_jupyter_window_id()
+        matplotlib_thread = self._start_matplotlib_thread()
 
         try:
-            yield keyboard, proc
+            yield keyboard, wait_for_cell, idle_padding, before_cell
         finally:
             # Signal threads to stop
             self.video_manager.stop_recording()
             self.matplotlib_event.set()  # Signal matplotlib thread to stop
-            self._join_threads(recording_thread, matplotlib_thread)
+            self._join_matplotlib_thread(matplotlib_thread)
 
             # Force kill process if still running
             if proc and proc.poll() is None:
@@ -398,13 +494,46 @@ class CodingTutorial:
             if window_id:
                 self._platform_manager.close_window_by_id(window_id)
 
+            if kernel_manager is not None:
+                kernel_client.stop_channels()
+                kernel_manager.shutdown_kernel(now=True)
+
     def _main(self):
         """Orchestrates the main tutorial creation workflow."""
         code_cells = self._generate_tutorial_code()
-        with self._recording_session() as (keyboard, proc):
-            self.time_dict = self._type_code(code_cells, keyboard, proc)
+        # Synthesise narration while the kernel and console start up and the
+        # first cells are typed; each cell only waits for its own narration.
+        audio_futures = self.audio_manager.submit_audio_files(
+            code_cells, self.audio_path
+        )
+        if not self.force_approve:
+            # Narration approval reads from this terminal; finish it first.
+            for future in audio_futures:
+                future.result()
+
+        def audio_length(i):
+            return _get_audio_length(audio_futures[i].result())
+
+        with self._recording_session() as (
+            keyboard,
+            wait_for_cell,
+            idle_padding,
+            before_cell,
+        ):
+            self.time_dict = self._type_code(
+                code_cells,
+                audio_length,
+                keyboard,
+                wait_for_cell,
+                idle_padding,
+                before_cell,
+            )
         self.video_manager.overlay_audio(
-            self.time_dict, self.audio_path, self.title_list, self.flowchart_list
+            self.time_dict,
+            self.audio_path,
+            self.title_list,
+            self.flowchart_list,
+            self._recording_start,
         )
 
     def make_tutorial(self):
@@ -1,10 +1,22 @@
 import re
+import json
+import queue
+import time
 from pydub import AudioSegment
 import psutil
 import cv2
 import numpy as np
 import textwrap
 import os
+from pathlib import Path
+
+# Fenced code blocks (optionally tagged with a language) in model responses.
+_CODE_BLOCK_RE = re.compile(r"```(\w+)?\n(.*?)```", re.DOTALL)
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+# "1.", "2)", "Snippet 3:" ... headers of numbered narration sections.
+_NUMBERED_SECTION_RE = re.compile(
+    r"^\s*(?:Snippet\s*)?\d+\s*[.:)]\s*", re.MULTILINE | re.IGNORECASE
+)
 
 
 def create_title(
@@ -109,41 +121,170 @@ def create_title(
     return os.path.abspath(output_file)
 
 
+# (path, mtime_ns, size) -> length in seconds
+_AUDIO_LENGTHS = {}
+
+
 def _get_audio_length(audio_file):
-    """Returns length of the audio in seconds."""
-    audio = AudioSegment.from_file(audio_file)
-    return len(audio) / 1000
+    """Returns length of the audio in seconds.
+
+    Lengths are cached in memory and in a `<file>.length.json` sidecar, both
+    keyed on the file's mtime and size, so a rewritten file is measured again.
+    """
+    _path = Path(audio_file)
+    _stat = _path.stat()
+    _key = (str(_path), _stat.st_mtime_ns, _stat.st_size)
+    if _key in _AUDIO_LENGTHS:
+        return _AUDIO_LENGTHS[_key]
+
+    _sidecar = _path.with_name(_path.name + ".length.json")
+    try:
+        _entry = json.loads(_sidecar.read_text())
+        if (_entry["mtime_ns"], _entry["size"]) != _key[1:]:
+            raise ValueError("stale sidecar")
+        _length = _entry["length"]
+    except (OSError, ValueError, KeyError, TypeError):
+        _length = len(AudioSegment.from_file(_path)) / 1000
+        try:
+            _sidecar.write_text(
+                json.dumps(
+                    {"mtime_ns": _key[1], "size": _key[2], "length": _length}
+                )
+            )
+        except OSError:
+            pass  # The sidecar is only a cache; the length is still valid.
+
+    _AUDIO_LENGTHS[_key] = _length
+    return _length
+
+
+# How long the kernel must stay quiet after its last outstanding request
+# before a cell counts as finished; a console may send follow-up requests.
+_EXECUTION_SETTLE_TIME = 0.3
+
+
+def _drain_iopub(kernel_client):
+    """Discard iopub messages left over from earlier cells."""
+    while True:
+        try:
+            kernel_client.get_iopub_msg(timeout=0)
+        except queue.Empty:
+            return
+
+
+def _wait_for_execution(kernel_client, timeout):
+    """Block until the kernel goes idle after executing a cell.
+
+    The iopub channel broadcasts kernel messages for requests from every
+    client, including the console the code is typed into. Each request is
+    identified by its `execute_input` broadcast, and the cell is done once
+    every such request has been answered by an idle status and no new one
+    follows. Drain stale messages with `_drain_iopub` before typing the cell.
+    Returns False on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    pending = set()
+    seen_execution = False
+    while (remaining := deadline - time.monotonic()) > 0:
+        if seen_execution and not pending:
+            remaining = min(remaining, _EXECUTION_SETTLE_TIME)
+        try:
+            msg = kernel_client.get_iopub_msg(timeout=remaining)
+        except queue.Empty:
+            if seen_execution and not pending:
+                return True
+            break
+        parent_id = msg["parent_header"].get("msg_id")
+        if msg["msg_type"] == "execute_input":
+            pending.add(parent_id)
+            seen_execution = True
+        elif (
+            msg["msg_type"] == "status"
+            and msg["content"]["execution_state"] == "idle"
+        ):
+            pending.discard(parent_id)
+    return seen_execution and not pending
+
+
+def _poll_until_idle(proc, timeout, interval):
+    """Fallback for `_wait_for_execution`: poll the console's CPU usage."""
+    deadline = time.monotonic() + timeout
+    _is_jupyter_idle(proc)  # Start the CPU measurement window
+    while True:
+        time.sleep(interval)
+        if _is_jupyter_idle(proc):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+
+
+# (pid, create time) -> psutil.Process, kept between polls so `cpu_percent`
+# measures usage since the previous poll instead of blocking to sample it.
+# The create time tells a reused pid apart from the process that had it.
+_CPU_WATCHERS = {}
 
 
 def _is_jupyter_idle(proc):
-    """Check if the IPython process is idle by monitoring its CPU usage."""
+    """Check if the IPython process is idle by monitoring its CPU usage.
+
+    Doesn't block: usage is measured since the previous call, so poll it at
+    a fixed interval. A process seen for the first time has no baseline yet
+    and counts as busy.
+    """
     try:
         p = psutil.Process(proc.pid)
         # Get all child processes
-        children = p.children(recursive=True)
+        processes = [p, *p.children(recursive=True)]
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        _CPU_WATCHERS.clear()
+        return True  # If process is gone or inaccessible, consider it done
 
-        # Check CPU usage of main process and all children
-        total_cpu = p.cpu_percent(interval=0.1)
-        for child in children:
-            try:
-                total_cpu += child.cpu_percent(interval=0.1)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+    # Check CPU usage of main process and all children
+    total_cpu = 0.0
+    unmeasured = False
+    watchers = {}
+    for process in processes:
+        try:
+            key = (process.pid, process.create_time())
+            watched = _CPU_WATCHERS.get(key, process)
+            total_cpu += watched.cpu_percent(interval=None)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+        unmeasured |= key not in _CPU_WATCHERS
+        watchers[key] = watched
 
-        return total_cpu < 5.0  # Higher threshold for combined CPU usage
+    # Keep only the current process tree, dropping processes that exited.
+    _CPU_WATCHERS.clear()
+    _CPU_WATCHERS.update(watchers)
 
-    except (psutil.NoSuchProcess, psutil.AccessDenied):
-        return True  # If process is gone or inaccessible, consider it done
+    return not unmeasured and total_cpu < 5.0  # Threshold for combined usage
 
 
 def parse_code(text):
     """Parse the first code snippet containing triple backticks."""
-    code_blocks = re.findall(r"```(\w+)?\n(.*?)```", text, re.DOTALL)
+    code_blocks = _CODE_BLOCK_RE.findall(text)
     _list = [{"language": lang, "code": code.strip()} for lang, code in code_blocks]
     _snippets = [iter_["code"] for iter_ in _list]
     return _snippets
 
 
+def parse_narrations(text):
+    """Parse a JSON array of narrations, falling back to numbered sections."""
+    _match = _JSON_ARRAY_RE.search(text)
+    if _match:
+        try:
+            _narrations = json.loads(_match.group(0))
+        except json.JSONDecodeError:
+            _narrations = None
+        if isinstance(_narrations, list) and all(
+            isinstance(n, str) for n in _narrations
+        ):
+            return [n.strip() for n in _narrations]
+
+    _sections = _NUMBERED_SECTION_RE.split(text)
+    return [section.strip() for section in _sections if section.strip()]
+
+
 def needs_flowchart(code_snippet: str) -> bool:
     """
     Determines if a code snippet would benefit from a flowchart visualization.
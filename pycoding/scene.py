@@ -1,43 +1,84 @@
-from pynput.keyboard import Controller
-import pyautogui
+import re
 import time
+from functools import partial
+
+# A word with its trailing whitespace (or a run of leading whitespace).
+_WORD_RE = re.compile(r"\S+\s*|\s+")
 
 
 class CodingScene:
+    """Types a code snippet line by line into the focused window."""
+
     def __init__(self, code_snippet, language, delay):
         self.code_snippet = code_snippet
         self.language = language
         self.delay = delay
+        self._scene = make_scene_factory(language, delay)(code_snippet)
+
+    def type_code(self):
+        self._scene.type_code()
+
+
+class _Scene:
+    """Typing loop shared by the language-specific scenes."""
+
+    def __init__(self, code_snippet, delay):
+        self.code_snippet = code_snippet
+        self.delay = delay
+
+    def _lines(self):
+        """Yield (text to type, indent gap to the next line or None) per line."""
+        for line in self.code_snippet:
+            yield line, None
 
     def type_code(self):
+        from pynput.keyboard import Controller, Key
+
         keyboard = Controller()
 
-        for idx in range(len(self.code_snippet)):
-            indent_gap = None
-            line = self.code_snippet[idx]
-
-            if "python" in self.language:
-                stripped_line = line.lstrip()
-                next_line = (
-                    self.code_snippet[idx + 1]
-                    if (idx + 1) < len(self.code_snippet)
-                    else None
-                )
-                curr_indent = len(line) - len(stripped_line)
-                if next_line is not None:
-                    next_indent = len(next_line) - len(next_line.lstrip())
-                    indent_gap = next_indent - curr_indent
+        for line, indent_gap in self._lines():
+            if self.delay:
+                # Type a word at a time, then pause for the word's typing time
+                for word in _WORD_RE.findall(line):
+                    keyboard.type(word)
+                    time.sleep(len(word) * self.delay)
             else:
-                stripped_line = line
-
-            # Type each character with consistent timing
-            for char in stripped_line:
-                keyboard.press(char)
-                time.sleep(self.delay)
-                keyboard.release(char)
-            pyautogui.press("enter")
+                keyboard.type(line)  # Instant mode: whole line at once
+            keyboard.tap(Key.enter)
 
             if indent_gap is not None:
                 if indent_gap < 0:
                     for _ in range(-1 * indent_gap):
-                        pyautogui.press("backspace")
+                        keyboard.tap(Key.backspace)
+
+
+class _GenericScene(_Scene):
+    """Lines are typed verbatim, leading whitespace included."""
+
+
+class _PythonScene(_Scene):
+    """Lines are typed without indentation; the console auto-indents, so
+    dedents are undone with backspaces."""
+
+    def _lines(self):
+        # Strip and measure every line once, up front
+        stripped = [line.lstrip() for line in self.code_snippet]
+        indents = [
+            len(line) - len(stripped_line)
+            for line, stripped_line in zip(self.code_snippet, stripped)
+        ]
+
+        for idx, stripped_line in enumerate(stripped):
+            indent_gap = None
+            if (idx + 1) < len(stripped):
+                indent_gap = indents[idx + 1] - indents[idx]
+            yield stripped_line, indent_gap
+
+
+def make_scene_factory(language, delay):
+    """Return a `lines -> scene` callable specialized for `language`.
+
+    Unlike `CodingScene`, the language is resolved once, not per snippet.
+    """
+    scene_class = _PythonScene if "python" in language else _GenericScene
+    return partial(scene_class, delay=delay)